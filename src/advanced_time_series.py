@@ -5,84 +5,183 @@ import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import streamlit as st
 from datetime import datetime, timedelta
-from scipy import signal
-from scipy.stats import zscore
+from functools import lru_cache
+from scipy.signal import savgol_coeffs
+from numpy.lib.stride_tricks import sliding_window_view
+from numba import njit
 import warnings
 warnings.filterwarnings('ignore')
 
+# Upper bound on points sent to the browser for a raw daily trace
+MAX_PLOT_POINTS = 2000
+
+@njit(cache=True)
+def _anomaly_mask(values, threshold):
+    """Flag values whose absolute z-score exceeds threshold (fused single kernel, NaNs skipped)"""
+    n = values.size
+    count = 0
+    total = 0.0
+    for x in values:
+        if not np.isnan(x):
+            total += x
+            count += 1
+    out = np.zeros(n, np.bool_)
+    if count == 0:
+        return out
+    mean = total / count
+    var = 0.0
+    for x in values:
+        if not np.isnan(x):
+            d = x - mean
+            var += d * d
+    std = (var / count) ** 0.5
+    for i in range(n):
+        out[i] = abs(values[i] - mean) > threshold * std
+    return out
+
+def _rolling_mean(values, window):
+    """Centered rolling mean matching pandas rolling(center=True), NaN at the edges"""
+    out = np.full(values.shape, np.nan)
+    if values.size < window:
+        return out
+    means = sliding_window_view(values, window).mean(axis=1)
+    start = window // 2
+    out[start:start + means.size] = means
+    return out
+
+@lru_cache(maxsize=32)
+def _savgol_kernels(window, polyorder=3):
+    """Savitzky-Golay FIR coefficients plus the polynomial fit used for the edge points"""
+    coeffs = savgol_coeffs(window, polyorder)
+    positions = np.vander(np.arange(window, dtype=np.float64), polyorder + 1)
+    edge_fit = positions @ np.linalg.pinv(positions)
+    return coeffs, edge_fit
+
+def _savgol_smooth(values, window, polyorder=3):
+    """Savitzky-Golay smoothing equivalent to scipy's savgol_filter(mode='interp')"""
+    coeffs, edge_fit = _savgol_kernels(window, polyorder)
+    half = window // 2
+    out = np.convolve(values, coeffs, mode='same')
+    out[:half] = edge_fit[:half] @ values[:window]
+    out[-half:] = edge_fit[-half:] @ values[-window:]
+    return out
+
+def _lttb_indices(x, y, n_out):
+    """Indices kept by Largest-Triangle-Three-Buckets downsampling of (x, y)"""
+    n = len(x)
+    if n <= n_out or n_out < 3:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    keep = np.empty(n_out, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_hi = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[hi:next_hi].mean()
+        avg_y = y[hi:next_hi].mean()
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(area))
+        keep[i + 1] = a
+    return keep
+
+def _frame_fingerprint(df):
+    """Cheap cache key for an order frame (size plus first/last rows)"""
+    if df.empty:
+        return (0,)
+    return (len(df), df.index[0], df.index[-1], df['Order date'].iat[0], df['Order date'].iat[-1])
+
+@st.cache_resource(hash_funcs={pd.DataFrame: _frame_fingerprint})
+def _prepare_time_series_data(df):
+    """Build the feature frame plus daily and weekly aggregations for a filtered dataset
+    (shared, not copied, across reruns; callers treat the returned frames as read-only)"""
+    # Ensure datetime columns in a single new frame
+    # (the caller's dataframe is never mutated, so no defensive copy is needed)
+    df = df.assign(**{
+        'Order date': pd.to_datetime(df['Order date']),
+        'Event start date': pd.to_datetime(df['Event start date']),
+        'day_of_week': df['day_of_week'].astype('category')
+    })
+    # ISO week of each order, decomposed once here rather than on every heatmap render
+    df['order_week'] = df['Order date'].dt.isocalendar().week.astype('UInt8')
+    
+    # Create daily aggregations, keeping only days with orders
+    daily_data = df.resample('D', on='Order date').agg({
+        'Order ID': 'count',
+        'Gross sales': 'sum',
+        'Ticket quantity': 'sum',
+        'customer_id': 'nunique'
+    })
+    daily_data.columns = ['Orders', 'Revenue', 'Tickets', 'Unique_Customers']
+    daily_data = daily_data[daily_data['Orders'] > 0]
+    
+    # Roll the additive daily totals up to Monday-starting weeks;
+    # unique customers are not additive so they come from the raw orders
+    weekly_data = daily_data[['Orders', 'Revenue', 'Tickets']].resample('W-MON', label='left', closed='left').sum()
+    weekly_data['Unique_Customers'] = df.resample(
+        'W-MON', on='Order date', label='left', closed='left'
+    )['customer_id'].nunique()
+    weekly_data = weekly_data[weekly_data['Orders'] > 0].rename_axis('Week_Start').reset_index()
+    daily_data = daily_data.rename_axis('Date').reset_index()
+    
+    # Counts fit comfortably in int32; revenue stays float64 so hover labels and sums stay exact
+    narrow_dtypes = {'Orders': 'int32', 'Tickets': 'int32', 'Unique_Customers': 'int32'}
+    daily_data = daily_data.astype(narrow_dtypes)
+    weekly_data = weekly_data.astype(narrow_dtypes)
+    
+    # Per-customer aggregates for the lifecycle chart
+    customer_stats = df.groupby('customer_id', observed=True).agg(
+        first_order=('Order date', 'min'),
+        last_order=('Order date', 'max'),
+        total_orders=('Order date', 'count'),
+        total_spent=('Gross sales', 'sum')
+    ).reset_index()
+    
+    return df, daily_data, weekly_data, customer_stats
+
 class AdvancedTimeSeriesAnalysis:
     def __init__(self, df):
-        self.df = df.copy()
-        self.prepare_time_series_data()
-    
-    def prepare_time_series_data(self):
-        """Prepare data for time series analysis"""
-        # Ensure datetime columns
-        self.df['Order date'] = pd.to_datetime(self.df['Order date'])
-        self.df['Event start date'] = pd.to_datetime(self.df['Event start date'])
-        
-        # Create time-based features
-        self.df['order_week'] = self.df['Order date'].dt.isocalendar().week
-        self.df['order_year'] = self.df['Order date'].dt.year
-        self.df['order_weekday'] = self.df['Order date'].dt.dayofweek
-        self.df['order_hour'] = self.df['Order date'].dt.hour
-        
-        # Create daily aggregations
-        self.daily_data = self.df.groupby(self.df['Order date'].dt.date).agg({
-            'Order ID': 'count',
-            'Gross sales': 'sum',
-            'Ticket quantity': 'sum',
-            'customer_id': 'nunique'
-        }).reset_index()
-        self.daily_data.columns = ['Date', 'Orders', 'Revenue', 'Tickets', 'Unique_Customers']
-        self.daily_data['Date'] = pd.to_datetime(self.daily_data['Date'])
-        self.daily_data = self.daily_data.sort_values('Date')
-        
-        # Create weekly aggregations
-        self.weekly_data = self.df.groupby([
-            self.df['Order date'].dt.isocalendar().year,
-            self.df['Order date'].dt.isocalendar().week
-        ]).agg({
-            'Order ID': 'count',
-            'Gross sales': 'sum',
-            'Ticket quantity': 'sum',
-            'customer_id': 'nunique'
-        }).reset_index()
-        self.weekly_data.columns = ['Year', 'Week', 'Orders', 'Revenue', 'Tickets', 'Unique_Customers']
-        
-        # Create week start dates for plotting
-        self.weekly_data['Week_Start'] = pd.to_datetime(
-            self.weekly_data['Year'].astype(str) + '-W' + 
-            self.weekly_data['Week'].astype(str).str.zfill(2) + '-1', 
-            format='%Y-W%W-%w'
-        )
-        self.weekly_data = self.weekly_data.sort_values('Week_Start')
+        self._anomaly_cache = {}
+        self.prepare_time_series_data(df)
+    
+    def prepare_time_series_data(self, df):
+        """Prepare data for time series analysis (cached per filtered dataset)"""
+        self.df, self.daily_data, self.weekly_data, self.customer_stats = _prepare_time_series_data(df)
     
     def apply_smoothing(self, data, method='rolling', window=7, alpha=0.3):
         """Apply various smoothing techniques"""
         if method == 'rolling':
-            return data.rolling(window=window, center=True).mean()
+            return pd.Series(_rolling_mean(data.to_numpy(dtype=np.float64), window), index=data.index)
         elif method == 'exponential':
-            return data.ewm(alpha=alpha).mean()
+            return data.ewm(alpha=alpha).mean(engine='numba')
         elif method == 'savgol':
             if len(data) > window:
-                return pd.Series(signal.savgol_filter(data, window, 3), index=data.index)
+                return pd.Series(_savgol_smooth(data.to_numpy(dtype=np.float64), window), index=data.index)
             else:
                 return data
         else:
             return data
     
-    def detect_anomalies(self, data, threshold=2):
-        """Detect anomalies using z-score"""
-        z_scores = np.abs(zscore(data.dropna()))
-        return z_scores > threshold
+    def downsample_daily(self, metric, n_out=MAX_PLOT_POINTS):
+        """Daily rows thinned with LTTB so the raw trace stays light to render"""
+        dates = self.daily_data['Date'].to_numpy().astype('datetime64[ns]').astype(np.int64)
+        x = (dates - dates[0]).astype(np.float64) if len(dates) else dates.astype(np.float64)
+        y = self.daily_data[metric].to_numpy(dtype=np.float64)
+        return self.daily_data.iloc[_lttb_indices(x, y, n_out)]
+    
+    def detect_anomalies(self, metric, threshold=2):
+        """Detect anomalies in a daily metric using z-score (cached per analyzer)"""
+        key = (metric, threshold)
+        mask = self._anomaly_cache.get(key)
+        if mask is None:
+            values = self.daily_data[metric].to_numpy(dtype=np.float64)
+            mask = _anomaly_mask(values, float(threshold))
+            self._anomaly_cache[key] = mask
+        return mask
     
     def analyze_weekly_patterns(self):
         """Analyze patterns by week of year"""
-        weekly_patterns = self.df.groupby([
-            self.df['Order date'].dt.isocalendar().week,
-            self.df['day_of_week']
-        ]).agg({
+        weekly_patterns = self.df.groupby(['order_week', 'day_of_week'], observed=True).agg({
             'Order ID': 'count',
             'Gross sales': 'sum'
         }).reset_index()
@@ -95,7 +194,7 @@ class AdvancedTimeSeriesAnalysis:
         """Create interactive time series plot with controls"""
         
         # Get data based on granularity
-        data = self.daily_data.copy()
+        data = self.daily_data
         
         # Apply smoothing
         smoothed_data = self.apply_smoothing(data[metric], smoothing_method, window, alpha)
@@ -103,10 +202,11 @@ class AdvancedTimeSeriesAnalysis:
         # Create figure
         fig = go.Figure()
         
-        # Add original data
+        # Add original data (downsampled for large ranges)
+        original = self.downsample_daily(metric)
         fig.add_trace(go.Scatter(
-            x=data['Date'],
-            y=data[metric],
+            x=original['Date'],
+            y=original[metric],
             mode='lines+markers',
             name=f'Original {metric}',
             line=dict(color='lightblue', width=1),
@@ -125,7 +225,7 @@ class AdvancedTimeSeriesAnalysis:
         
         # Add anomalies if requested
         if show_anomalies:
-            anomalies = self.detect_anomalies(data[metric])
+            anomalies = self.detect_anomalies(metric)
             if anomalies.any():
                 anomaly_dates = data.loc[anomalies, 'Date']
                 anomaly_values = data.loc[anomalies, metric]
@@ -199,14 +299,7 @@ class AdvancedTimeSeriesAnalysis:
         """Create Gantt-like chart for repeat customer lifecycles"""
         
         # Get repeat customers
-        customer_analysis = self.df.groupby('customer_id').agg({
-            'Order date': ['min', 'max', 'count'],
-            'Gross sales': 'sum',
-            'day_of_week': lambda x: list(set(x))
-        }).reset_index()
-        
-        # Flatten column names
-        customer_analysis.columns = ['customer_id', 'first_order', 'last_order', 'total_orders', 'total_spent', 'days_attended']
+        customer_analysis = self.customer_stats
         
         # Filter for repeat customers and get either top or bottom spenders
         repeat_customers = customer_analysis[customer_analysis['total_orders'] >= 3]
@@ -215,52 +308,63 @@ class AdvancedTimeSeriesAnalysis:
         else:
             top_customers = repeat_customers.nsmallest(top_n, 'total_spent')
 
-        # Calculate customer lifetime
-        top_customers['lifetime_days'] = (
-            pd.to_datetime(top_customers['last_order']) - 
-            pd.to_datetime(top_customers['first_order'])
-        ).dt.days
+        # Calculate customer lifetime (first/last order are already datetime64)
+        top_customers['lifetime_days'] = (top_customers['last_order'] - top_customers['first_order']).dt.days
+        
+        # Orders of the selected customers, tagged with each customer's rank
+        top_orders = self.df[self.df['customer_id'].isin(top_customers['customer_id'])]
+        order_rank = pd.Index(top_customers['customer_id']).get_indexer(top_orders['customer_id'])
+        
+        # Day lists only for the charted customers
+        days_attended = top_orders.groupby('customer_id', observed=True)['day_of_week'].unique().map(list)
+        top_customers = top_customers.join(days_attended.rename('days_attended'), on='customer_id')
         
         # Create Gantt chart
         fig = go.Figure()
         
         colors = px.colors.qualitative.Set3
         
-        for i, (_, customer) in enumerate(top_customers.iterrows()):
-            # Get all orders for this customer
-            customer_orders = self.df[self.df['customer_id'] == customer['customer_id']].copy()
-            customer_orders = customer_orders.sort_values('Order date')
-            
-            # Add customer lifecycle bar
-            fig.add_trace(go.Scatter(
-                x=[customer['first_order'], customer['last_order']],
-                y=[i, i],
-                mode='lines',
-                line=dict(color=colors[i % len(colors)], width=8),
-                name=f"Customer {i+1}",
-                hovertemplate=f"<b>Customer {i+1}</b><br>" +
-                            f"Orders: {customer['total_orders']}<br>" +
-                            f"Spent: ${customer['total_spent']:.2f}<br>" +
-                            f"Days: {customer['days_attended']}<br>" +
-                            f"Lifetime: {customer['lifetime_days']} days<extra></extra>"
-            ))
-            
-            # Add individual order points
-            fig.add_trace(go.Scatter(
-                x=customer_orders['Order date'],
-                y=[i] * len(customer_orders),
-                mode='markers',
-                marker=dict(
-                    color=colors[i % len(colors)],
-                    size=8,
-                    symbol='circle',
-                    line=dict(color='white', width=1)
-                ),
-                showlegend=False,
-                hovertemplate="<b>Order</b><br>" +
-                            "Date: %{x}<br>" +
-                            "Amount: $" + customer_orders['Gross sales'].astype(str) + "<extra></extra>"
-            ))
+        # Customer lifecycle bars as a single trace, separated by None gaps
+        bar_x, bar_y, bar_info = [], [], []
+        for i, customer in enumerate(top_customers.itertuples(index=False)):
+            info = [f"Customer {i+1}", customer.total_orders, customer.total_spent,
+                    str(customer.days_attended), customer.lifetime_days]
+            bar_x += [customer.first_order, customer.last_order, None]
+            bar_y += [i, i, None]
+            bar_info += [info, info, info]
+        
+        fig.add_trace(go.Scatter(
+            x=bar_x,
+            y=bar_y,
+            customdata=bar_info,
+            mode='lines',
+            line=dict(color='lightgray', width=8),
+            name='Customer lifetime',
+            hovertemplate="<b>%{customdata[0]}</b><br>" +
+                        "Orders: %{customdata[1]}<br>" +
+                        "Spent: $%{customdata[2]:.2f}<br>" +
+                        "Days: %{customdata[3]}<br>" +
+                        "Lifetime: %{customdata[4]} days<extra></extra>"
+        ))
+        
+        # All individual order points as a single trace, colored by customer
+        fig.add_trace(go.Scatter(
+            x=top_orders['Order date'],
+            y=order_rank,
+            customdata=top_orders[['Gross sales']].to_numpy(dtype=np.float64),
+            mode='markers',
+            marker=dict(
+                color=np.asarray(colors)[order_rank % len(colors)],
+                size=8,
+                symbol='circle',
+                line=dict(color='white', width=1)
+            ),
+            name='Orders',
+            showlegend=False,
+            hovertemplate="<b>Order</b><br>" +
+                        "Date: %{x}<br>" +
+                        "Amount: $%{customdata[0]:.2f}<extra></extra>"
+        ))
         
         fig.update_layout(
             title=f'Customer Lifecycle Timeline - Top {top_n} Repeat Customers',
@@ -288,10 +392,10 @@ def show_gantt_customer_subheader(analyzer):
     
     # Filter data based on selection
     if show_filter != "All Shows":
-        filtered_df = analyzer.df[analyzer.df['day_of_week'] == show_filter].copy()
+        filtered_df = analyzer.df[analyzer.df['day_of_week'] == show_filter]
         st.info(f"📊 Analyzing {show_filter} shows only ({len(filtered_df)} orders)")
     else:
-        filtered_df = analyzer.df.copy()
+        filtered_df = analyzer.df
         st.info(f"📊 Analyzing all shows ({len(filtered_df)} orders)")
     
     # Initialize time series analyzer with filtered data
@@ -319,10 +423,10 @@ def show_advanced_time_series_tab(analyzer):
     
     # Filter data based on selection
     if show_filter != "All Shows":
-        filtered_df = analyzer.df[analyzer.df['day_of_week'] == show_filter].copy()
+        filtered_df = analyzer.df[analyzer.df['day_of_week'] == show_filter]
         st.info(f"📊 Analyzing {show_filter} shows only ({len(filtered_df)} orders)")
     else:
-        filtered_df = analyzer.df.copy()
+        filtered_df = analyzer.df
         st.info(f"📊 Analyzing all shows ({len(filtered_df)} orders)")
     
     # Initialize time series analyzer with filtered data
@@ -368,7 +472,7 @@ def show_advanced_time_series_tab(analyzer):
         )
     else:
         # Simple plot without smoothing
-        data = ts_analyzer.daily_data
+        data = ts_analyzer.downsample_daily(metric)
         fig = go.Figure()
         fig.add_trace(go.Scatter(
             x=data['Date'],
@@ -425,14 +529,17 @@ def show_advanced_time_series_tab(analyzer):
             weekly_growth = weekly_data['Orders'].pct_change().mean() * 100
             st.metric("Avg Weekly Growth", f"{weekly_growth:+.1f}%")
         
-        # Anomaly count
-        anomalies = ts_analyzer.detect_anomalies(daily_data['Orders'])
-        anomaly_count = anomalies.sum()
-        st.metric("Anomaly Days", f"{anomaly_count}")
+        # Anomaly count (reuses the plot's cached mask when the metric is Orders)
+        if show_anomalies:
+            anomaly_count = ts_analyzer.detect_anomalies('Orders').sum()
+            st.metric("Anomaly Days", f"{anomaly_count}")
     
     # Insights text
+    volatility_insight = f"The time series shows {'high' if volatility > avg_daily_orders * 0.5 else 'moderate'} volatility"
+    if show_anomalies:
+        volatility_insight += f" with {anomaly_count} anomalous days detected"
     insights = [
-        f"The time series shows {'high' if volatility > avg_daily_orders * 0.5 else 'moderate'} volatility with {anomaly_count} anomalous days detected",
+        volatility_insight,
         f"Recent 30-day trend shows {'growth' if trend > 0 else 'decline'} of {abs(trend):.1f}% compared to early period"
     ]
     
@@ -1,112 +1,100 @@
 #!/usr/bin/env python3
 """
 Basic Comedy Ticket Sales Analysis
-This script provides high-level analysis that can run with minimal dependencies.
+This script provides high-level analysis using pandas, numpy and orjson.
 """
 
-import csv
 import os
-from datetime import datetime, timedelta
-from collections import defaultdict, Counter
-import json
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+import orjson
+
+def count_values(values, top=None):
+    """Count occurrences of each value, most common first"""
+    vals, counts = np.unique(np.asarray(values), return_counts=True)
+    order = np.argsort(-counts, kind='stable')[:top]
+    return dict(zip(vals[order].tolist(), counts[order].tolist()))
+
+def load_day_csv(filepath):
+    """Load a single day's CSV file and tag its rows with the day name"""
+    df_day = pd.read_csv(filepath, dtype=str, keep_default_na=False)
+    df_day['day_of_week'] = os.path.basename(filepath).replace('.csv', '')
+    return df_day
 
 def load_csv_data(data_folder='src/data'):
-    """Load all CSV files and combine them"""
-    all_data = []
+    """Load all CSV files (in parallel) and combine them into a single DataFrame"""
     csv_files = [f for f in os.listdir(data_folder) if f.endswith('.csv') and 'eda' not in f.lower()]
     
-    for filename in csv_files:
-        filepath = os.path.join(data_folder, filename)
-        day_name = filename.replace('.csv', '')
-        
-        with open(filepath, 'r', encoding='utf-8') as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                row['day_of_week'] = day_name
-                all_data.append(row)
-        
-        print(f"Loaded {sum(1 for _ in open(filepath)) - 1} records from {day_name}")
-    
-    print(f"Total records loaded: {len(all_data)}")
-    return all_data
+    if not csv_files:
+        return pd.DataFrame()
+    
+    # pandas' C parser releases the GIL, so the files parse concurrently
+    filepaths = [os.path.join(data_folder, filename) for filename in csv_files]
+    with ThreadPoolExecutor(max_workers=min(8, len(filepaths))) as executor:
+        dataframes = list(executor.map(load_day_csv, filepaths))
+    
+    for filename, df_day in zip(csv_files, dataframes):
+        print(f"Loaded {len(df_day)} records from {filename.replace('.csv', '')}")
+    
+    df = pd.concat(dataframes, ignore_index=True)
+    df['day_of_week'] = df['day_of_week'].astype('category')
+    print(f"Total records loaded: {len(df)}")
+    return df
 
-def analyze_data(data):
+def analyze_data(df):
     """Perform basic analysis on the data"""
     results = {}
     
+    ticket_quantity = pd.to_numeric(df['Ticket quantity'], errors='coerce')
+    gross_sales = pd.to_numeric(df['Gross sales'], errors='coerce')
+    emails = df['Buyer email'].str.lower()
+    emails = emails[emails != '']
+    
     # Basic metrics
-    results['total_orders'] = len(data)
-    results['total_tickets'] = sum(int(row.get('Ticket quantity', 0)) for row in data)
-    results['total_revenue'] = sum(float(row.get('Gross sales', 0)) for row in data if row.get('Gross sales'))
-    results['unique_customers'] = len(set(row.get('Buyer email', '').lower() for row in data if row.get('Buyer email')))
+    results['total_orders'] = len(df)
+    results['total_tickets'] = int(ticket_quantity.sum())
+    results['total_revenue'] = float(gross_sales.sum())
+    results['unique_customers'] = int(emails.nunique())
     
     # Time analysis
-    order_dates = []
-    event_dates = []
-    days_before_event = []
-    order_hours = []
-    
-    for row in data:
-        try:
-            order_date = datetime.strptime(row['Order date'], '%Y-%m-%d %H:%M:%S')
-            event_date = datetime.strptime(row['Event start date'], '%Y-%m-%d')
-            
-            order_dates.append(order_date)
-            event_dates.append(event_date)
-            
-            days_diff = (event_date - order_date).days
-            days_before_event.append(days_diff)
-            order_hours.append(order_date.hour)
-        except (ValueError, KeyError):
-            continue
+    order_dates = pd.to_datetime(df['Order date'], format='%Y-%m-%d %H:%M:%S', errors='coerce')
+    event_dates = pd.to_datetime(df['Event start date'], format='%Y-%m-%d', errors='coerce')
+    valid_dates = order_dates.notna() & event_dates.notna()
+    order_dates = order_dates[valid_dates]
+    days_before_event = (event_dates[valid_dates] - order_dates).dt.days
     
     # Purchase timing analysis
-    if days_before_event:
-        results['avg_days_before_event'] = sum(days_before_event) / len(days_before_event)
-        results['same_day_purchases'] = sum(1 for d in days_before_event if d == 0)
-        results['last_minute_purchases'] = sum(1 for d in days_before_event if d <= 1)
-        results['advance_purchases'] = sum(1 for d in days_before_event if d >= 7)
+    if len(days_before_event):
+        results['avg_days_before_event'] = float(days_before_event.mean())
+        results['same_day_purchases'] = int((days_before_event == 0).sum())
+        results['last_minute_purchases'] = int((days_before_event <= 1).sum())
+        results['advance_purchases'] = int((days_before_event >= 7).sum())
     
     # Hourly patterns
-    hour_counts = Counter(order_hours)
-    results['peak_hour'] = max(hour_counts, key=hour_counts.get) if hour_counts else None
-    results['hourly_distribution'] = dict(hour_counts)
+    hour_counts = np.bincount(order_dates.dt.hour.to_numpy(), minlength=24)
+    results['peak_hour'] = int(np.argmax(hour_counts)) if len(order_dates) else None
+    results['hourly_distribution'] = {hour: int(count) for hour, count in enumerate(hour_counts) if count}
     
     # Day of week analysis
-    day_counts = Counter(row['day_of_week'] for row in data)
-    results['orders_by_day'] = dict(day_counts)
+    results['orders_by_day'] = count_values(df['day_of_week'])
     
     # Customer analysis
-    customer_orders = defaultdict(int)
-    customer_spending = defaultdict(float)
-    
-    for row in data:
-        email = row.get('Buyer email', '').lower()
-        if email:
-            customer_orders[email] += 1
-            try:
-                customer_spending[email] += float(row.get('Gross sales', 0))
-            except (ValueError, TypeError):
-                pass
-    
-    repeat_customers = sum(1 for count in customer_orders.values() if count > 1)
-    results['repeat_customer_rate'] = (repeat_customers / len(customer_orders) * 100) if customer_orders else 0
-    results['avg_orders_per_customer'] = sum(customer_orders.values()) / len(customer_orders) if customer_orders else 0
+    customer_orders = emails.value_counts()
     
-    # Geographic analysis
-    state_counts = Counter(row.get('Purchaser state', 'Unknown') for row in data)
-    city_counts = Counter(row.get('Purchaser city', 'Unknown') for row in data)
+    repeat_customers = int((customer_orders > 1).sum())
+    results['repeat_customer_rate'] = (repeat_customers / len(customer_orders) * 100) if len(customer_orders) else 0
+    results['avg_orders_per_customer'] = float(customer_orders.mean()) if len(customer_orders) else 0
     
-    results['top_states'] = dict(state_counts.most_common(10))
-    results['top_cities'] = dict(city_counts.most_common(10))
+    # Geographic analysis
+    results['top_states'] = count_values(df['Purchaser state'], top=10)
+    results['top_cities'] = count_values(df['Purchaser city'], top=10)
     
     # Payment analysis
-    payment_counts = Counter(row.get('Payment type', 'Unknown') for row in data)
-    results['payment_methods'] = dict(payment_counts)
+    results['payment_methods'] = count_values(df['Payment type'])
     
     # Ticket quantity analysis
-    quantity_counts = Counter(int(row.get('Ticket quantity', 1)) for row in data if row.get('Ticket quantity'))
-    results['ticket_quantities'] = dict(quantity_counts)
+    results['ticket_quantities'] = count_values(ticket_quantity.dropna().astype(int))
     
     return results
 
@@ -158,8 +146,13 @@ def print_analysis_results(results):
 
 def save_results_json(results, filename='analysis_results.json'):
     """Save results to JSON file"""
-    with open(filename, 'w') as f:
-        json.dump(results, f, indent=2, default=str)
+    # Write to a temp file and swap it in so readers never see a partial file
+    tmp_filename = f"{filename}.tmp"
+    with open(tmp_filename, 'wb') as f:
+        # orjson walks the dict once in C (int keys such as hours become strings, as in json)
+        f.write(orjson.dumps(results, default=str,
+                             option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY))
+    os.replace(tmp_filename, filename)
     print(f"\nResults saved to {filename}")
 
 def main():
@@ -169,7 +162,7 @@ def main():
     # Load data
     data = load_csv_data()
     
-    if not data:
+    if data.empty:
         print("No data found! Please check that CSV files exist in src/data/")
         return
     
@@ -2,15 +2,22 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
+import plotly.io as pio
 from plotly.subplots import make_subplots
 import numpy as np
-from show_insights import ShowInsights
+from show_insights import ShowInsights, BOOKING_LABELS, booking_window_codes, largest_rows
 from advanced_time_series import show_advanced_time_series_tab, show_gantt_customer_subheader
-import json
+import orjson
 import os
 import subprocess
 import sys
 
+# Written by basic_analysis.py
+BASIC_RESULTS_FILE = 'analysis_results.json'
+
+# Serialize figures with orjson (Streamlit already skips validation in to_json)
+pio.json.config.default_engine = 'orjson'
+
 # Page config
 st.set_page_config(
     page_title="Comedy Analysis",
@@ -51,29 +58,104 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-@st.cache_data
+@st.cache_resource
 def load_show_analysis():
-    """Load and cache the show analysis data"""
+    """Load and cache the show analysis data (shared, unpickled singleton: treat as read-only)"""
     analyzer = ShowInsights()
     analyzer.load_data()
+    
+    # Ticket counts get a narrow int (ShowInsights already narrows days_before_event and
+    # makes the text columns categorical)
+    analyzer.df['Ticket quantity'] = pd.to_numeric(analyzer.df['Ticket quantity'], downcast='integer')
     return analyzer
 
+@st.cache_resource
+def start_basic_analysis():
+    """Run the basic analysis in a background process (once per server)"""
+    return subprocess.Popen([sys.executable, 'src/basic_analysis.py'],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
 @st.cache_data
+def read_basic_analysis_results(mtime):
+    """Load basic analysis results from JSON file (cache keyed on its modification time)"""
+    with open(BASIC_RESULTS_FILE, 'rb') as f:
+        return orjson.loads(f.read())
+
 def load_basic_analysis_results():
-    """Load basic analysis results from JSON file"""
-    if os.path.exists('basic_analysis_results.json'):
-        with open('basic_analysis_results.json', 'r') as f:
-            return json.load(f)
-    else:
-        st.info("Running basic analysis... This may take a moment.")
-        result = subprocess.run([sys.executable, 'src/basic_analysis.py'], 
-                              capture_output=True, text=True)
-        if result.returncode == 0:
-            with open('analysis_results.json', 'r') as f:
-                return json.load(f)
-        else:
-            st.error("Failed to run basic analysis. Please check the logs.")
-            return None
+    """Return basic analysis results, or None while the background analysis is producing them"""
+    if os.path.exists(BASIC_RESULTS_FILE):
+        return read_basic_analysis_results(os.path.getmtime(BASIC_RESULTS_FILE))
+    # A run that exited (non-zero, or with no data to write) without producing the file failed;
+    # forget it so the next rerun starts a fresh one
+    if start_basic_analysis().poll() is not None and not os.path.exists(BASIC_RESULTS_FILE):
+        start_basic_analysis.clear()
+        st.error("Failed to run basic analysis. Please check the logs.")
+    return None
+
+@st.cache_data
+def compute_shows_df(df):
+    """Aggregate show-level metrics plus the Overview filter options (cached across reruns with the same data)"""
+    show_data = df.assign(
+        _same_day=(df['days_before_event'] == 0).astype('int8'),
+        _free=df['Payment type'].eq('Free').astype('int8')
+    )
+    grouped = show_data.groupby(['Event start date', 'day_of_week'], sort=False, observed=True)
+    
+    # Sums run through numba's JIT kernels; size/nunique have no numba path, and the mean
+    # stays native (numba's mean divides by zero on an all-NaN group instead of returning NaN)
+    sums = grouped[['Gross sales', '_same_day', '_free']].sum(engine='numba')
+    shows_df = pd.DataFrame({
+        'Orders': grouped.size(),
+        'Revenue': sums['Gross sales'],
+        'Customers': grouped['customer_id'].nunique(),
+        'Avg_Days_Before': grouped['days_before_event'].mean(),
+        '_same_day': sums['_same_day'],
+        '_free': sums['_free']
+    }).reset_index().rename(columns={'Event start date': 'Date', 'day_of_week': 'Day'})
+    shows_df['Same_Day_Rate'] = shows_df.pop('_same_day') / shows_df['Orders']
+    shows_df['Free_Rate'] = shows_df.pop('_free') / shows_df['Orders']
+    # Per-show counts fit in int32 (smaller cached copy per rerun)
+    shows_df = shows_df.astype({'Orders': 'int32', 'Customers': 'int32'})
+    
+    day_options = ['All'] + shows_df['Day'].unique().tolist()
+    max_orders = int(shows_df['Orders'].max()) if len(shows_df) else 0
+    return shows_df, day_options, max_orders
+
+@st.cache_data
+def compute_repeat_customers(df):
+    """Aggregate repeat customer metrics (cached across reruns with the same data)"""
+    # Order counts straight from the customer codes, so the full aggregation
+    # only runs over rows of customers with 3+ orders
+    codes = df['customer_id'].cat.codes.to_numpy()
+    order_counts = np.bincount(codes[codes >= 0], minlength=len(df['customer_id'].cat.categories))
+    repeat_rows = (codes >= 0) & (order_counts[codes] >= 3)
+    
+    # Analyze customer behavior
+    customer_analysis = df[repeat_rows].groupby('customer_id', observed=True).agg({
+        'Order ID': 'count',
+        'Ticket quantity': 'sum',
+        'Gross sales': 'sum',
+        'Event start date': ['min', 'max'],
+        'day_of_week': 'nunique',
+        'Purchaser state': 'first',
+        'Purchaser city': 'first'
+    }).reset_index()
+    
+    # Flatten column names
+    customer_analysis.columns = ['customer_id', 'total_orders', 'total_tickets', 'total_spent', 
+                               'first_order', 'last_order', 'days_variety', 'state', 'city']
+    
+    # Filter for repeat customers
+    repeat_customers = customer_analysis[customer_analysis['total_orders'] >= 3].copy()
+    repeat_customers['avg_order_value'] = repeat_customers['total_spent'] / repeat_customers['total_orders']
+    
+    # Calculate customer lifetime (event dates are already datetime64 from ShowInsights.prepare_data)
+    repeat_customers['customer_lifetime_days'] = (
+        repeat_customers['last_order'] - repeat_customers['first_order']
+    ).dt.days
+    
+    total_customers = int(np.count_nonzero(order_counts))
+    return repeat_customers, total_customers
 
 def main():
     st.markdown('<h1 class="main-header">Comedy Analysis</h1>', unsafe_allow_html=True)
@@ -105,30 +187,10 @@ def main():
 def show_overview_analysis(analyzer):
     st.header("🎯 Overview")
     
-    # Get show results
-    show_groups = analyzer.df.groupby(['Event start date', 'day_of_week'])
-    show_results = []
-    
-    for (event_date, day_of_week), show_data in show_groups:
-        total_orders = len(show_data)
-        total_revenue = show_data['Gross sales'].sum()
-        unique_customers = show_data['customer_id'].nunique()
-        avg_days_before = show_data['days_before_event'].mean()
-        same_day_purchases = len(show_data[show_data['days_before_event'] == 0])
-        free_tickets = len(show_data[show_data['Payment type'] == 'Free'])
-        
-        show_results.append({
-            'Date': event_date,
-            'Day': day_of_week,
-            'Orders': total_orders,
-            'Revenue': total_revenue,
-            'Customers': unique_customers,
-            'Avg_Days_Before': avg_days_before,
-            'Same_Day_Rate': same_day_purchases / total_orders if total_orders > 0 else 0,
-            'Free_Rate': free_tickets / total_orders if total_orders > 0 else 0
-        })
-    
-    shows_df = pd.DataFrame(show_results)
+    shows_df, day_options, max_orders = compute_shows_df(analyzer.df)
+    if shows_df.empty:
+        st.warning("No shows to analyze.")
+        return
     
     # Key metrics
     col1, col2, col3, col4 = st.columns(4)
@@ -151,47 +213,42 @@ def show_overview_analysis(analyzer):
     # Add filters
     col1, col2 = st.columns(2)
     with col1:
-        selected_day = st.selectbox("Filter by Day", ['All'] + list(shows_df['Day'].unique()))
+        selected_day = st.selectbox("Filter by Day", day_options)
     with col2:
-        min_orders = st.slider("Minimum Orders", 0, int(shows_df['Orders'].max()), 0)
+        min_orders = st.slider("Minimum Orders", 0, max_orders, 0)
     
-    # Filter data
-    filtered_df = shows_df.copy()
+    # Filter data with a single boolean mask (no intermediate copies)
+    mask = shows_df['Orders'].values >= min_orders
     if selected_day != 'All':
-        filtered_df = filtered_df[filtered_df['Day'] == selected_day]
-    filtered_df = filtered_df[filtered_df['Orders'] >= min_orders]
+        mask &= shows_df['Day'].values == selected_day
     
     # Display filtered results
     st.dataframe(
-        filtered_df.sort_values('Orders', ascending=False),
+        shows_df.loc[mask].sort_values('Orders', ascending=False),
         use_container_width=True,
         hide_index=True
     )
 
-        # Day of week performance
-    day_performance = analyzer.df.groupby('day_of_week').agg({
-        'Order ID': 'count',
-        'Gross sales': 'sum',
-        'Event start date': 'nunique'
-    }).reset_index()
-    day_performance['avg_orders_per_show'] = day_performance['Order ID'] / day_performance['Event start date']
-    day_performance['avg_revenue_per_show'] = day_performance['Gross sales'] / day_performance['Event start date']
+    # Day of week performance (per-show averages straight from the show-level table)
+    day_perf = shows_df.groupby('Day', observed=True).agg(
+        avg_orders=('Orders', 'mean'),
+        avg_revenue=('Revenue', 'mean'),
+        n_shows=('Orders', 'size')
+    ).reset_index()
     
     st.subheader("🗓️ Best Day to Hold a Show")
     
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        fig = px.bar(day_performance.sort_values('avg_orders_per_show', ascending=False), 
-                    x='day_of_week', y='avg_orders_per_show',
-                    title="Average Orders per Show")
-        st.plotly_chart(fig, use_container_width=True)
-    
-    with col2:
-        fig = px.bar(day_performance.sort_values('avg_revenue_per_show', ascending=False), 
-                    x='day_of_week', y='avg_revenue_per_show',
-                    title="Average Revenue per Show")
-        st.plotly_chart(fig, use_container_width=True)
+    # Both per-show averages in one faceted figure (independent y axes)
+    per_show = day_perf.sort_values('avg_orders', ascending=False).rename(columns={
+        'avg_orders': 'Average Orders per Show',
+        'avg_revenue': 'Average Revenue per Show'
+    }).melt(id_vars='Day', value_vars=['Average Orders per Show', 'Average Revenue per Show'],
+            var_name='metric')
+    fig = px.bar(per_show, x='Day', y='value', color='metric', facet_col='metric')
+    fig.update_yaxes(matches=None, showticklabels=True, title_text='')
+    fig.for_each_annotation(lambda a: a.update(text=a.text.split('=')[-1]))
+    fig.update_layout(showlegend=False)
+    st.plotly_chart(fig, use_container_width=True)
     
     # Booking windows
     st.subheader("📈 Best Day to Sell Tickets")
@@ -201,55 +258,57 @@ def show_overview_analysis(analyzer):
     
     with col1:
         # Performance by day of week
-        day_performance = shows_df.groupby('Day').agg({
-            'Orders': 'mean',
-            'Revenue': 'mean'
-        }).reset_index()
-        
-        fig = px.bar(day_performance, x='Day', y='Orders',
+        fig = px.bar(day_perf, x='Day', y='avg_orders',
                     title="Average Orders by Day of Week")
         st.plotly_chart(fig, use_container_width=True)
     with col2:
-        booking_windows = pd.cut(analyzer.df['days_before_event'], 
-                            bins=[-1, 0, 1, 3, 7, 14, 30, float('inf')],
-                            labels=['Same Day', '1 Day', '2-3 Days', '4-7 Days', '1-2 Weeks', '2-4 Weeks', '1+ Month'])
-        
-        booking_analysis = analyzer.df.groupby(booking_windows, observed=True).agg({
-            'Order ID': 'count',
-            'Gross sales': 'sum'
-        }).reset_index()
-        booking_analysis['avg_order_value'] = booking_analysis['Gross sales'] / booking_analysis['Order ID']
-        
-        fig = px.bar(booking_analysis, x='days_before_event', y='Order ID',
-                    title="Orders by Booking Window")
-        st.plotly_chart(fig, use_container_width=True)
+        # Bin codes via binary search, then bincount counts and sums (-1 is out of range or NaN)
+        codes = booking_window_codes(analyzer.df['days_before_event'].to_numpy())
+        in_window = codes >= 0
+        codes = codes[in_window]
+        sales = np.nan_to_num(analyzer.df['Gross sales'].to_numpy(dtype='float64')[in_window])
+        booking_analysis = pd.DataFrame({
+            'booking_window': BOOKING_LABELS,
+            'Order ID': np.bincount(codes, minlength=len(BOOKING_LABELS)),
+            'Gross sales': np.bincount(codes, weights=sales, minlength=len(BOOKING_LABELS))
+        })
+        booking_analysis = booking_analysis[booking_analysis['Order ID'] > 0].reset_index(drop=True)
+        if booking_analysis.empty:
+            st.info("No orders fall into a booking window.")
+        else:
+            booking_analysis['avg_order_value'] = booking_analysis['Gross sales'] / booking_analysis['Order ID']
+            
+            fig = px.bar(booking_analysis, x='booking_window', y='Order ID',
+                        title="Orders by Booking Window")
+            st.plotly_chart(fig, use_container_width=True)
 
 
 def show_basic_time_series_analysis(analyzer):
     st.header("📈 Basic Time Series Analysis")
     
+    # Aggregate every day's shows in one pass (sorted by day, then event date)
+    show_totals = analyzer.df.groupby(['day_of_week', 'Event start date'], sort=True, observed=True).agg(
+        orders=('Order ID', 'count'),
+        revenue=('Gross sales', 'sum'),
+        tickets=('Ticket quantity', 'sum')
+    ).reset_index()
+    
     # Analyze each day
+    trend_days = []
     for day in ['Monday', 'Wednesday', 'Thursday', 'Friday', 'Saturday']:
-        day_data = analyzer.df[analyzer.df['day_of_week'] == day].copy()
+        daily_shows = show_totals.loc[show_totals['day_of_week'] == day]
         
-        if len(day_data) == 0:
+        if daily_shows.empty:
             continue
         
         st.subheader(f"📅 {day} Shows")
         
-        # Group by event date
-        daily_shows = day_data.groupby('Event start date').agg({
-            'Order ID': 'count',
-            'Gross sales': 'sum',
-            'Ticket quantity': 'sum'
-        }).reset_index()
-        
-        daily_shows = daily_shows.sort_values('Event start date')
-        
         if len(daily_shows) > 1:
             # Calculate changes
-            daily_shows['Orders_Change'] = daily_shows['Order ID'].pct_change() * 100
-            daily_shows['Revenue_Change'] = daily_shows['Gross sales'].pct_change() * 100
+            daily_shows = daily_shows.assign(
+                Orders_Change=daily_shows['orders'].pct_change() * 100,
+                Revenue_Change=daily_shows['revenue'].pct_change() * 100
+            )
             
             col1, col2, col3 = st.columns(3)
             
@@ -265,27 +324,32 @@ def show_basic_time_series_analysis(analyzer):
                 total_shows = len(daily_shows)
                 st.metric(f"Total {day} Shows", f"{total_shows}")
             
-            # Chart showing trend
-            fig = make_subplots(
-                rows=2, cols=1,
-                subplot_titles=(f'{day} Orders Over Time', f'{day} Revenue Over Time'),
-                vertical_spacing=0.1
-            )
-            
+            trend_days.append((day, daily_shows))
+    
+    # One figure for every day's trend: orders on the left, revenue on the right
+    if trend_days:
+        st.subheader("📈 Trends by Day")
+        fig = make_subplots(
+            rows=len(trend_days), cols=2,
+            subplot_titles=[title for day, _ in trend_days
+                            for title in (f'{day} Orders Over Time', f'{day} Revenue Over Time')],
+            vertical_spacing=0.25 / len(trend_days)
+        )
+        
+        for row, (day, daily_shows) in enumerate(trend_days, start=1):
             fig.add_trace(
-                go.Scatter(x=daily_shows['Event start date'], y=daily_shows['Order ID'],
-                          mode='lines+markers', name='Orders'),
-                row=1, col=1
+                go.Scatter(x=daily_shows['Event start date'], y=daily_shows['orders'],
+                          mode='lines+markers', name='Orders', line=dict(color='#636efa')),
+                row=row, col=1
             )
-            
             fig.add_trace(
-                go.Scatter(x=daily_shows['Event start date'], y=daily_shows['Gross sales'],
+                go.Scatter(x=daily_shows['Event start date'], y=daily_shows['revenue'],
                           mode='lines+markers', name='Revenue', line=dict(color='green')),
-                row=2, col=1
+                row=row, col=2
             )
-            
-            fig.update_layout(height=400, showlegend=False)
-            st.plotly_chart(fig, use_container_width=True)
+        
+        fig.update_layout(height=300 * len(trend_days), showlegend=False)
+        st.plotly_chart(fig, use_container_width=True)
 
 def show_customer_analysis(analyzer):
 
@@ -294,31 +358,7 @@ def show_customer_analysis(analyzer):
     # Case study categories
     st.subheader("🏆 Customer Case Studies")
         
-    # Analyze customer behavior
-    customer_analysis = analyzer.df.groupby('customer_id').agg({
-        'Order ID': 'count',
-        'Ticket quantity': 'sum',
-        'Gross sales': 'sum',
-        'Event start date': ['min', 'max'],
-        'day_of_week': lambda x: list(set(x)),
-        'Purchaser state': 'first',
-        'Purchaser city': 'first'
-    }).reset_index()
-    
-    # Flatten column names
-    customer_analysis.columns = ['customer_id', 'total_orders', 'total_tickets', 'total_spent', 
-                               'first_order', 'last_order', 'days_attended', 'state', 'city']
-    
-    # Filter for repeat customers
-    repeat_customers = customer_analysis[customer_analysis['total_orders'] >= 3].copy()
-    repeat_customers['avg_order_value'] = repeat_customers['total_spent'] / repeat_customers['total_orders']
-    repeat_customers['days_variety'] = repeat_customers['days_attended'].apply(len)
-    
-    # Calculate customer lifetime
-    repeat_customers['customer_lifetime_days'] = (
-        pd.to_datetime(repeat_customers['last_order']) - 
-        pd.to_datetime(repeat_customers['first_order'])
-    ).dt.days
+    repeat_customers, total_customers = compute_repeat_customers(analyzer.df)
     
     # Key metrics
     col1, col2, col3, col4 = st.columns(4)
@@ -326,7 +366,6 @@ def show_customer_analysis(analyzer):
     with col1:
         st.metric("Repeat Customers", f"{len(repeat_customers):,}")
     with col2:
-        total_customers = analyzer.df['customer_id'].nunique()
         repeat_rate = len(repeat_customers) / total_customers * 100
         st.metric("Repeat Rate", f"{repeat_rate:.1f}%")
     with col3:
@@ -342,71 +381,83 @@ def show_customer_analysis(analyzer):
     )
     
     if case_study_type == "Top Spenders":
-        top_customers = repeat_customers.nlargest(5, 'total_spent')
+        top_customers = largest_rows(repeat_customers, 'total_spent')
         st.markdown("### 💰 Top Spending Customers")
         
-        for i, (_, customer) in enumerate(top_customers.iterrows(), 1):
-            st.markdown(f"""
-            <div class="case-study-box">
-                <strong>Customer #{i} - {customer['city']}, {customer['state']}</strong><br>
-                💰 Total Spent: ${customer['total_spent']:.2f}<br>
-                🎫 Total Orders: {customer['total_orders']}<br>
-                📅 Days Attended: {customer['days_attended']}<br>
-                ⏱️ Customer Lifetime: {customer['customer_lifetime_days']} days<br>
-                💵 Avg Order Value: ${customer['avg_order_value']:.2f}
-            </div>
-            """, unsafe_allow_html=True)
+        render_case_study_cards(top_customers, analyzer.df, (
+            '<div class="case-study-box">'
+            '<strong>Customer #{i} - {c.city}, {c.state}</strong><br>'
+            '💰 Total Spent: ${c.total_spent:.2f}<br>'
+            '🎫 Total Orders: {c.total_orders}<br>'
+            '📅 Days Attended: {c.days_attended}<br>'
+            '⏱️ Customer Lifetime: {c.customer_lifetime_days} days<br>'
+            '💵 Avg Order Value: ${c.avg_order_value:.2f}'
+            '</div>'
+        ))
     
     elif case_study_type == "Most Frequent":
-        most_frequent = repeat_customers.nlargest(5, 'total_orders')
+        most_frequent = largest_rows(repeat_customers, 'total_orders')
         st.markdown("### 🎭 Most Frequent Attendees")
         
-        for i, (_, customer) in enumerate(most_frequent.iterrows(), 1):
-            st.markdown(f"""
-            <div class="case-study-box">
-                <strong>Customer #{i} - {customer['city']}, {customer['state']}</strong><br>
-                🎫 Total Orders: {customer['total_orders']}<br>
-                💰 Total Spent: ${customer['total_spent']:.2f}<br>
-                🌟 Days Variety: {customer['days_variety']} different days<br>
-                📅 Days Attended: {customer['days_attended']}<br>
-                💵 Avg Order Value: ${customer['avg_order_value']:.2f}
-            </div>
-            """, unsafe_allow_html=True)
+        render_case_study_cards(most_frequent, analyzer.df, (
+            '<div class="case-study-box">'
+            '<strong>Customer #{i} - {c.city}, {c.state}</strong><br>'
+            '🎫 Total Orders: {c.total_orders}<br>'
+            '💰 Total Spent: ${c.total_spent:.2f}<br>'
+            '🌟 Days Variety: {c.days_variety} different days<br>'
+            '📅 Days Attended: {c.days_attended}<br>'
+            '💵 Avg Order Value: ${c.avg_order_value:.2f}'
+            '</div>'
+        ))
     
     elif case_study_type == "Most Diverse":
-        most_diverse = repeat_customers.nlargest(5, 'days_variety')
+        most_diverse = largest_rows(repeat_customers, 'days_variety')
         st.markdown("### 🌟 Most Diverse Attendance")
         
-        for i, (_, customer) in enumerate(most_diverse.iterrows(), 1):
-            st.markdown(f"""
-            <div class="case-study-box">
-                <strong>Customer #{i} - {customer['city']}, {customer['state']}</strong><br>
-                🌟 Attends {customer['days_variety']} different days: {customer['days_attended']}<br>
-                🎫 Total Orders: {customer['total_orders']}<br>
-                💰 Total Spent: ${customer['total_spent']:.2f}<br>
-                ⏱️ Customer Lifetime: {customer['customer_lifetime_days']} days
-            </div>
-            """, unsafe_allow_html=True)
+        render_case_study_cards(most_diverse, analyzer.df, (
+            '<div class="case-study-box">'
+            '<strong>Customer #{i} - {c.city}, {c.state}</strong><br>'
+            '🌟 Attends {c.days_variety} different days: {c.days_attended}<br>'
+            '🎫 Total Orders: {c.total_orders}<br>'
+            '💰 Total Spent: ${c.total_spent:.2f}<br>'
+            '⏱️ Customer Lifetime: {c.customer_lifetime_days} days'
+            '</div>'
+        ))
     
     elif case_study_type == "Longest Relationship":
-        longest_relationship = repeat_customers.nlargest(5, 'customer_lifetime_days')
+        longest_relationship = largest_rows(repeat_customers, 'customer_lifetime_days')
         st.markdown("### ⏱️ Longest Customer Relationships")
         
-        for i, (_, customer) in enumerate(longest_relationship.iterrows(), 1):
-            st.markdown(f"""
-            <div class="case-study-box">
-                <strong>Customer #{i} - {customer['city']}, {customer['state']}</strong><br>
-                ⏱️ Customer Lifetime: {customer['customer_lifetime_days']} days<br>
-                🎫 Total Orders: {customer['total_orders']}<br>
-                💰 Total Spent: ${customer['total_spent']:.2f}<br>
-                📅 Days Attended: {customer['days_attended']}<br>
-                💵 Avg Order Value: ${customer['avg_order_value']:.2f}
-            </div>
-            """, unsafe_allow_html=True)
+        render_case_study_cards(longest_relationship, analyzer.df, (
+            '<div class="case-study-box">'
+            '<strong>Customer #{i} - {c.city}, {c.state}</strong><br>'
+            '⏱️ Customer Lifetime: {c.customer_lifetime_days} days<br>'
+            '🎫 Total Orders: {c.total_orders}<br>'
+            '💰 Total Spent: ${c.total_spent:.2f}<br>'
+            '📅 Days Attended: {c.days_attended}<br>'
+            '💵 Avg Order Value: ${c.avg_order_value:.2f}'
+            '</div>'
+        ))
+
+def render_case_study_cards(customers, df, card_template):
+    """Render customer case-study cards as a single HTML block"""
+    # Day lists only for the handful of customers shown (first-seen order, like groupby unique)
+    shown = df[df['customer_id'].isin(customers['customer_id'])]
+    days_attended = shown.groupby('customer_id', observed=True)['day_of_week'].unique().map(list)
+    customers = customers.join(days_attended.rename('days_attended'), on='customer_id')
+    cards = [
+        card_template.format(i=i, c=customer)
+        for i, customer in enumerate(customers.itertuples(index=False), 1)
+    ]
+    st.markdown("\n".join(cards), unsafe_allow_html=True)
 
 def show_geographic_analysis(results):
     st.header("🗺️ Geographic Analysis")
     
+    if results is None:
+        st.info("Basic analysis results are not ready yet... Refresh in a moment to see geographic results.")
+        return
+    
     # Top states
     st.subheader("🏛️ Top States by Orders")
     
@@ -426,9 +477,9 @@ def show_geographic_analysis(results):
     st.subheader("🏙️ Top Cities by Orders")
     
     if 'top_cities' in results:
-        cities_data = results['top_cities']
+        cities_data = pd.Series(results['top_cities'])
         # Remove empty city names
-        cities_filtered = {k: v for k, v in cities_data.items() if k.strip()}
+        cities_filtered = cities_data[cities_data.index.astype(str).str.strip() != '']
         st.bar_chart(cities_filtered)
 
 
@@ -4,39 +4,143 @@ from datetime import datetime, timedelta
 import glob
 import os
 import json
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+from numba import njit
+
+# Arrow CSV conversion: typed date columns, and empty/NA text read as nulls like pd.read_csv
+CSV_CONVERT_OPTIONS = pa_csv.ConvertOptions(
+    column_types={'Order date': pa.timestamp('us'), 'Event start date': pa.timestamp('us')},
+    strings_can_be_null=True
+)
+
+# Booking window edges (right-closed, like pd.cut) and their labels
+BOOKING_BINS = np.array([-1, 0, 1, 3, 7, 14, 30, np.inf])
+BOOKING_LABELS = ['Same Day', '1 Day', '2-3 Days', '4-7 Days', '1-2 Weeks', '2-4 Weeks', '1+ Month']
+
+# One bit per weekday, so a customer's attended days OR together into a single uint8
+DAY_BIT = {'Monday': 1, 'Tuesday': 2, 'Wednesday': 4, 'Thursday': 8, 'Friday': 16, 'Saturday': 32, 'Sunday': 64}
+
+def day_names(day_mask):
+    """Decode a DAY_BIT mask into weekday names (calendar order)"""
+    return [day for day, bit in DAY_BIT.items() if day_mask & bit]
+
+def booking_window_codes(days_before_event):
+    """Map days-before-event values to BOOKING_LABELS indices (-1 when out of range or NaN)"""
+    codes = np.searchsorted(BOOKING_BINS, np.asarray(days_before_event), side='left') - 1
+    codes[codes >= len(BOOKING_LABELS)] = -1
+    return codes
+
+def print_lines(lines):
+    """Print a block of report lines with a single write"""
+    if lines:
+        print('\n'.join(lines))
+
+def largest_rows(df, col, n=5):
+    """Return the n rows with the largest col values, ties in original order (like nlargest, NaN rows dropped)"""
+    values = df[col].to_numpy(dtype='float64', na_value=np.nan)
+    has_value = ~np.isnan(values)
+    if not has_value.all():
+        df, values = df[has_value], values[has_value]
+    if len(values) > n:
+        # O(n) selection of the cutoff, then sort only the rows at or above it
+        cutoff = values[np.argpartition(values, -n)[-n]]
+        df = df[values >= cutoff]
+    return df.sort_values(col, ascending=False, kind='stable').head(n)
+
+@njit(cache=True)
+def _aggregate_customers(cust_codes, day_bits, state_codes, city_codes, gross, dates, qty, n_customers):
+    """Single-pass per-customer totals, first/last event (int64, NaT skipped), OR of day bits and first state/city codes"""
+    nat = np.iinfo(np.int64).min
+    orders = np.zeros(n_customers, np.int64)
+    tickets = np.zeros(n_customers, qty.dtype)
+    spent = np.zeros(n_customers, np.float64)
+    first = np.full(n_customers, nat, np.int64)
+    last = np.full(n_customers, nat, np.int64)
+    days = np.zeros(n_customers, np.uint8)
+    state = np.full(n_customers, -1, np.int64)
+    city = np.full(n_customers, -1, np.int64)
+    for i in range(cust_codes.size):
+        c = cust_codes[i]
+        if c < 0:
+            continue
+        orders[c] += 1
+        if qty[i] == qty[i]:
+            tickets[c] += qty[i]
+        if not np.isnan(gross[i]):
+            spent[c] += gross[i]
+        d = dates[i]
+        if d != nat:
+            if first[c] == nat or d < first[c]:
+                first[c] = d
+            if last[c] == nat or d > last[c]:
+                last[c] = d
+        days[c] |= day_bits[i]
+        if state[c] < 0:
+            state[c] = state_codes[i]
+        if city[c] < 0:
+            city[c] = city_codes[i]
+    return orders, tickets, spent, first, last, days, state, city
 
 class ShowInsights:
     def __init__(self, data_folder='src/data'):
         self.data_folder = data_folder
         self.df = None
+        self._show_results = None
+        self._day_performance = None
         
     def load_data(self):
-        """Load all CSV files and combine them"""
-        csv_files = glob.glob(os.path.join(self.data_folder, '*.csv'))
-        dataframes = []
-        
-        for file in csv_files:
-            if file.endswith('.csv') and not 'eda' in file.lower():
-                day_name = os.path.basename(file).replace('.csv', '')
-                df_temp = pd.read_csv(file)
-                df_temp['day_of_week'] = day_name
-                dataframes.append(df_temp)
-                print(f"Loaded {len(df_temp)} records from {day_name}")
-        
-        self.df = pd.concat(dataframes, ignore_index=True)
+        """Load all CSV files (in parallel) and combine them"""
+        csv_files = [file for file in glob.glob(os.path.join(self.data_folder, '*.csv'))
+                     if not 'eda' in file.lower()]
+        
+        # Arrow CSV parsing and Parquet reads release the GIL, so the files load concurrently
+        with ThreadPoolExecutor(max_workers=max(1, min(8, len(csv_files)))) as executor:
+            tables = list(executor.map(self.read_day_file, csv_files))
+        
+        for i, file in enumerate(csv_files):
+            day_name = os.path.basename(file).replace('.csv', '')
+            tables[i] = tables[i].append_column('day_of_week', pa.array([day_name] * tables[i].num_rows))
+            print(f"Loaded {tables[i].num_rows} records from {day_name}")
+        
+        # One Arrow concat and a single conversion to pandas (buffers released as they convert)
+        combined = pa.concat_tables(tables, promote_options='permissive')
+        tables.clear()
+        self.df = combined.to_pandas(split_blocks=True, self_destruct=True)
+        del combined
         print(f"Total records loaded: {len(self.df)}")
         
         # Clean and prepare data
         self.prepare_data()
         
+    def read_day_file(self, csv_file):
+        """Read a day's orders as an Arrow table, preferring an up-to-date Parquet copy of the CSV
+        (the copy is written next to the CSV on a cache miss; src/data/*.parquet is git-ignored)"""
+        parquet_file = csv_file[:-len('.csv')] + '.parquet'
+        if os.path.exists(parquet_file) and os.path.getmtime(parquet_file) >= os.path.getmtime(csv_file):
+            return pq.read_table(parquet_file)
+        
+        table = pa_csv.read_csv(csv_file, convert_options=CSV_CONVERT_OPTIONS)
+        # Columnar copy makes the next load much faster; skip quietly if it can't be written
+        try:
+            pq.write_table(table, parquet_file)
+        except (OSError, pa.ArrowException):
+            pass
+        return table
+        
     def prepare_data(self):
         """Clean and prepare the data for analysis"""
         # Convert date columns
         self.df['Order date'] = pd.to_datetime(self.df['Order date'])
         self.df['Event start date'] = pd.to_datetime(self.df['Event start date'])
         
-        # Calculate days between order and event
-        self.df['days_before_event'] = (self.df['Event start date'] - self.df['Order date']).dt.days
+        # Calculate days between order and event (narrowest int that fits; float if any date is missing)
+        self.df['days_before_event'] = pd.to_numeric(
+            (self.df['Event start date'] - self.df['Order date']).dt.days, downcast='integer'
+        )
         
         # Clean revenue columns
         revenue_cols = ['Gross sales', 'Ticket revenue', 'Net sales']
@@ -44,49 +148,93 @@ class ShowInsights:
             if col in self.df.columns:
                 self.df[col] = pd.to_numeric(self.df[col], errors='coerce')
         
-        # Create customer identifier
+        # Create customer identifier (Arrow strings lowercase in one vectorized kernel;
+        # pandas >= 3 already loads text as Arrow-backed str, older versions give object)
+        if self.df['Buyer email'].dtype == object:
+            self.df['Buyer email'] = self.df['Buyer email'].astype('string[pyarrow]')
         self.df['customer_id'] = self.df['Buyer email'].str.lower()
         
+        # Integer customer codes (ids sorted, like groupby order) for fast per-group counting;
+        # the column uses NaN for missing emails so nunique skips them as it does for strings
+        self._cust_codes, self._customer_ids = pd.factorize(self.df['customer_id'], sort=True)
+        self.df['_cust_code'] = self._cust_codes
+        if (self._cust_codes < 0).any():
+            self.df['_cust_code'] = self.df['_cust_code'].where(self._cust_codes >= 0)
+        
+        # Reuse the codes for a categorical customer_id (no second hash of the email strings)
+        self.df['customer_id'] = pd.Categorical.from_codes(self._cust_codes, categories=self._customer_ids)
+        
+        # Low-cardinality text columns as categoricals (integer-code groupbys and comparisons)
+        for col in ('day_of_week', 'Payment type', 'Purchaser state', 'Purchaser city'):
+            self.df[col] = self.df[col].astype('category')
+        
+        # Weekday bit per row, looked up through the category codes (code -1 maps to 0)
+        days = self.df['day_of_week'].cat
+        category_bits = np.array([DAY_BIT.get(day, 0) for day in days.categories] + [0], dtype=np.uint8)
+        self.df['_day_bit'] = category_bits[days.codes.to_numpy()]
+        
+        # Row masks (and their counts) reused by several analyses
+        self._same_day_mask = (self.df['days_before_event'] == 0).to_numpy()
+        self._free_mask = self.df['Payment type'].eq('Free').to_numpy()
+        self._same_day_count = int(self._same_day_mask.sum())
+        self._free_count = int(self._free_mask.sum())
+        
+        # Fresh data invalidates memoized results
+        self._show_results = None
+        self._day_performance = None
+        self.__dict__.pop('customer_totals', None)
+        
+    @cached_property
+    def customer_totals(self):
+        """Orders and gross sales per customer (computed once, shared across analyses)"""
+        # Direct bincounts over the prepared customer codes (missing emails excluded, NaN sales as 0)
+        in_customer = self._cust_codes >= 0
+        codes = self._cust_codes[in_customer]
+        sales = np.nan_to_num(self.df['Gross sales'].to_numpy(dtype='float64')[in_customer])
+        n_customers = len(self._customer_ids)
+        return pd.DataFrame({
+            'orders': np.bincount(codes, minlength=n_customers),
+            'spent': np.bincount(codes, weights=sales, minlength=n_customers)
+        }, index=self._customer_ids)
+        
     def analyze_individual_shows(self):
         """Analyze each individual show performance"""
+        if self._show_results is not None:
+            return self._show_results
+        
         print("\n" + "="*60)
         print("INDIVIDUAL SHOW ANALYSIS")
         print("="*60)
         
-        # Group by individual shows
-        show_groups = self.df.groupby(['Event start date', 'day_of_week'])
-        
-        show_results = []
-        for (event_date, day_of_week), show_data in show_groups:
-            total_orders = len(show_data)
-            total_revenue = show_data['Gross sales'].sum()
-            unique_customers = show_data['customer_id'].nunique()
-            avg_days_before = show_data['days_before_event'].mean()
-            same_day_purchases = len(show_data[show_data['days_before_event'] == 0])
-            free_tickets = len(show_data[show_data['Payment type'] == 'Free'])
-            
-            show_results.append({
-                'date': event_date,
-                'day': day_of_week,
-                'orders': total_orders,
-                'revenue': total_revenue,
-                'customers': unique_customers,
-                'avg_days_before': avg_days_before,
-                'same_day_rate': same_day_purchases / total_orders if total_orders > 0 else 0,
-                'free_rate': free_tickets / total_orders if total_orders > 0 else 0
-            })
-        
-        # Sort by orders to find best/worst
-        show_results.sort(key=lambda x: x['orders'], reverse=True)
+        # Aggregate every show in one pass (flags precomputed so the counts are plain sums)
+        show_data = self.df.assign(_same_day=self._same_day_mask, _free=self._free_mask)
+        shows = show_data.groupby(['Event start date', 'day_of_week'], sort=False, observed=True).agg(
+            orders=('Order ID', 'size'),
+            revenue=('Gross sales', 'sum'),
+            customers=('_cust_code', 'nunique'),
+            avg_days_before=('days_before_event', 'mean'),
+            same_day=('_same_day', 'sum'),
+            free=('_free', 'sum')
+        ).sort_index()  # date order on the small result keeps tie order in the rankings
+        shows['same_day_rate'] = shows.pop('same_day') / shows['orders']
+        shows['free_rate'] = shows.pop('free') / shows['orders']
+        shows = shows.astype({'orders': 'int32', 'customers': 'int32'})
+        
+        show_results = shows.rename_axis(['date', 'day']).reset_index()
+        
+        # Best/worst shows by orders (heap selection; ties keep date order like a stable sort)
+        top_shows = show_results.nlargest(5, 'orders')
+        bottom_shows = show_results.iloc[::-1].nsmallest(5, 'orders').iloc[::-1]
         
         print(f"\n🏆 TOP 5 PERFORMING SHOWS:")
-        for i, show in enumerate(show_results[:5], 1):
-            print(f"   {i}. {show['date']} ({show['day']}): {show['orders']} orders, ${show['revenue']:.2f}")
+        print_lines([f"   {i}. {show.date} ({show.day}): {show.orders} orders, ${show.revenue:.2f}"
+                     for i, show in enumerate(top_shows.itertuples(index=False), 1)])
         
         print(f"\n📉 BOTTOM 5 PERFORMING SHOWS:")
-        for i, show in enumerate(show_results[-5:], 1):
-            print(f"   {i}. {show['date']} ({show['day']}): {show['orders']} orders, ${show['revenue']:.2f}")
+        print_lines([f"   {i}. {show.date} ({show.day}): {show.orders} orders, ${show.revenue:.2f}"
+                     for i, show in enumerate(bottom_shows.itertuples(index=False), 1)])
         
+        self._show_results = show_results
         return show_results
     
     def week_over_week_analysis(self):
@@ -95,26 +243,26 @@ class ShowInsights:
         print("WEEK-OVER-WEEK ANALYSIS BY DAY")
         print("="*60)
         
+        # Show-level totals for every day at once, then sorted by day and event date
+        daily = self.df.groupby(['day_of_week', 'Event start date'], sort=False, observed=True).agg(
+            orders=('Order ID', 'count'),
+            revenue=('Gross sales', 'sum'),
+            tickets=('Ticket quantity', 'sum')
+        ).sort_index()
+        
+        # Week-over-week changes within each day
+        changes = daily.groupby(level='day_of_week', sort=False, observed=True)[['orders', 'revenue']].pct_change() * 100
+        daily['orders_change'] = changes['orders']
+        daily['revenue_change'] = changes['revenue']
+        shown_days = set(daily.index.get_level_values('day_of_week'))
+        
         for day in ['Monday', 'Wednesday', 'Thursday', 'Friday', 'Saturday']:
-            day_data = self.df[self.df['day_of_week'] == day].copy()
-            
-            if len(day_data) == 0:
+            if day not in shown_days:
                 continue
-                
-            # Group by event date to get show-level data
-            daily_shows = day_data.groupby('Event start date').agg({
-                'Order ID': 'count',
-                'Gross sales': 'sum',
-                'Ticket quantity': 'sum'
-            }).reset_index()
             
-            daily_shows = daily_shows.sort_values('Event start date')
+            daily_shows = daily.xs(day, level='day_of_week')
             
             if len(daily_shows) > 1:
-                # Calculate week-over-week changes
-                daily_shows['orders_change'] = daily_shows['Order ID'].pct_change() * 100
-                daily_shows['revenue_change'] = daily_shows['Gross sales'].pct_change() * 100
-                
                 avg_order_growth = daily_shows['orders_change'].mean()
                 avg_revenue_growth = daily_shows['revenue_change'].mean()
                 
@@ -126,10 +274,11 @@ class ShowInsights:
                 # Show specific examples
                 if len(daily_shows) >= 3:
                     recent_shows = daily_shows.tail(3)
-                    print(f"   Recent performance:")
-                    for _, show in recent_shows.iterrows():
-                        change_str = f"{show['orders_change']:+.1f}%" if not pd.isna(show['orders_change']) else "N/A"
-                        print(f"     {show['Event start date']}: {show['Order ID']} orders ({change_str})")
+                    lines = [f"   Recent performance:"]
+                    for event_date, show in zip(recent_shows.index, recent_shows.itertuples(index=False)):
+                        change_str = f"{show.orders_change:+.1f}%" if not pd.isna(show.orders_change) else "N/A"
+                        lines.append(f"     {event_date}: {show.orders} orders ({change_str})")
+                    print_lines(lines)
     
     def repeat_customer_case_studies(self):
         """Identify interesting repeat customer patterns"""
@@ -137,123 +286,163 @@ class ShowInsights:
         print("REPEAT CUSTOMER CASE STUDIES")
         print("="*60)
         
-        # Analyze customer behavior
-        customer_analysis = self.df.groupby('customer_id').agg({
-            'Order ID': 'count',
-            'Ticket quantity': 'sum',
-            'Gross sales': 'sum',
-            'Event start date': ['min', 'max'],
-            'day_of_week': lambda x: list(set(x)),
-            'Purchaser state': 'first',
-            'Purchaser city': 'first'
-        }).reset_index()
-        
-        # Flatten column names
-        customer_analysis.columns = ['customer_id', 'total_orders', 'total_tickets', 'total_spent', 
-                                   'first_order', 'last_order', 'days_attended', 'state', 'city']
+        # Analyze customer behavior with one compiled pass over the prepared customer codes
+        cust_codes, customer_ids = self._cust_codes, self._customer_ids
+        event_dates = self.df['Event start date']
+        # Ticket totals accumulate in the kernel's input type, so widen it first like groupby sum does
+        # (the dashboard downcasts the column to int8/int16, which would wrap around)
+        qty = self.df['Ticket quantity'].to_numpy()
+        qty = qty.astype(np.float64 if qty.dtype.kind == 'f' else np.int64, copy=False)
+        orders, tickets, spent, first, last, day_masks, state_codes, city_codes = _aggregate_customers(
+            cust_codes, self.df['_day_bit'].to_numpy(),
+            self.df['Purchaser state'].cat.codes.to_numpy(), self.df['Purchaser city'].cat.codes.to_numpy(),
+            self.df['Gross sales'].to_numpy(dtype='float64'), event_dates.to_numpy().view('int64'),
+            qty, len(customer_ids)
+        )
+        customer_analysis = pd.DataFrame({
+            'customer_id': customer_ids,
+            'total_orders': orders,
+            'total_tickets': tickets,
+            'total_spent': spent,
+            'first_order': first.view(event_dates.dtype),
+            'last_order': last.view(event_dates.dtype),
+            'day_mask': day_masks,
+            'state': pd.Categorical.from_codes(state_codes, dtype=self.df['Purchaser state'].dtype),
+            'city': pd.Categorical.from_codes(city_codes, dtype=self.df['Purchaser city'].dtype)
+        })
         
         # Filter for repeat customers (3+ orders)
         repeat_customers = customer_analysis[customer_analysis['total_orders'] >= 3].copy()
         repeat_customers['avg_order_value'] = repeat_customers['total_spent'] / repeat_customers['total_orders']
-        repeat_customers['days_variety'] = repeat_customers['days_attended'].apply(len)
+        repeat_customers['days_variety'] = np.unpackbits(
+            repeat_customers['day_mask'].to_numpy()[:, None], axis=1
+        ).sum(axis=1)
         
-        # Calculate customer lifetime
+        # Calculate customer lifetime (first/last order are already datetime64)
         repeat_customers['customer_lifetime_days'] = (
-            pd.to_datetime(repeat_customers['last_order']) - 
-            pd.to_datetime(repeat_customers['first_order'])
+            repeat_customers['last_order'] - repeat_customers['first_order']
         ).dt.days
         
         print(f"\n👥 FOUND {len(repeat_customers)} REPEAT CUSTOMERS (3+ orders)")
         
         # Top spenders
-        top_spenders = repeat_customers.nlargest(3, 'total_spent')
+        top_spenders = largest_rows(repeat_customers, 'total_spent', n=3)
         print(f"\n💰 TOP SPENDERS:")
+        lines = []
         for i, customer in top_spenders.iterrows():
-            print(f"   Customer from {customer['city']}, {customer['state']}")
-            print(f"   • Total spent: ${customer['total_spent']:.2f}")
-            print(f"   • Orders: {customer['total_orders']}")
-            print(f"   • Days attended: {customer['days_attended']}")
-            print(f"   • Customer lifetime: {customer['customer_lifetime_days']} days")
-            print()
+            lines += [
+                f"   Customer from {customer['city']}, {customer['state']}",
+                f"   • Total spent: ${customer['total_spent']:.2f}",
+                f"   • Orders: {customer['total_orders']}",
+                f"   • Days attended: {day_names(customer['day_mask'])}",
+                f"   • Customer lifetime: {customer['customer_lifetime_days']} days",
+                ""
+            ]
+        print_lines(lines)
         
         # Most frequent attendees
-        most_frequent = repeat_customers.nlargest(3, 'total_orders')
+        most_frequent = largest_rows(repeat_customers, 'total_orders', n=3)
         print(f"\n🎭 MOST FREQUENT ATTENDEES:")
+        lines = []
         for i, customer in most_frequent.iterrows():
-            print(f"   Customer from {customer['city']}, {customer['state']}")
-            print(f"   • Total orders: {customer['total_orders']}")
-            print(f"   • Total spent: ${customer['total_spent']:.2f}")
-            print(f"   • Days variety: {customer['days_variety']} different days")
-            print(f"   • Avg order value: ${customer['avg_order_value']:.2f}")
-            print()
+            lines += [
+                f"   Customer from {customer['city']}, {customer['state']}",
+                f"   • Total orders: {customer['total_orders']}",
+                f"   • Total spent: ${customer['total_spent']:.2f}",
+                f"   • Days variety: {customer['days_variety']} different days",
+                f"   • Avg order value: ${customer['avg_order_value']:.2f}",
+                ""
+            ]
+        print_lines(lines)
         
         # Most diverse attendance
-        most_diverse = repeat_customers.nlargest(3, 'days_variety')
+        most_diverse = largest_rows(repeat_customers, 'days_variety', n=3)
         print(f"\n🌟 MOST DIVERSE ATTENDANCE:")
+        lines = []
         for i, customer in most_diverse.iterrows():
-            print(f"   Customer from {customer['city']}, {customer['state']}")
-            print(f"   • Attends {customer['days_variety']} different days: {customer['days_attended']}")
-            print(f"   • Total orders: {customer['total_orders']}")
-            print(f"   • Total spent: ${customer['total_spent']:.2f}")
-            print()
+            lines += [
+                f"   Customer from {customer['city']}, {customer['state']}",
+                f"   • Attends {customer['days_variety']} different days: {day_names(customer['day_mask'])}",
+                f"   • Total orders: {customer['total_orders']}",
+                f"   • Total spent: ${customer['total_spent']:.2f}",
+                ""
+            ]
+        print_lines(lines)
     
     def controllable_variables_analysis(self):
         """Analyze variables that showrunners can control"""
+        if self._day_performance is not None:
+            return self._day_performance
+        
         print("\n" + "="*60)
         print("CONTROLLABLE VARIABLES FOR SHOWRUNNERS")
         print("="*60)
         
-        # 1. Day of week performance
-        day_performance = self.df.groupby('day_of_week').agg({
-            'Order ID': 'count',
+        # One full-frame pass per (day, show, payment type); the day and pricing
+        # tables below are cheap reductions of this small result
+        # (dropna=False keeps orders without a payment type in the day totals)
+        show_payments = self.df.groupby(
+            ['day_of_week', 'Event start date', 'Payment type'], sort=False, observed=True, dropna=False
+        ).agg({'Order ID': 'count', 'Gross sales': 'sum'})
+        
+        # 1. Day of week performance (one row per show, so counting dates counts distinct shows)
+        day_shows = show_payments.groupby(
+            level=['day_of_week', 'Event start date'], sort=False, observed=True, dropna=False
+        ).sum().reset_index()
+        day_performance = day_shows.groupby('day_of_week', sort=False, observed=True).agg({
+            'Order ID': 'sum',
             'Gross sales': 'sum',
-            'Event start date': 'nunique'
-        }).reset_index()
+            'Event start date': 'count'
+        }).sort_index().reset_index()
         day_performance['avg_orders_per_show'] = day_performance['Order ID'] / day_performance['Event start date']
         day_performance['avg_revenue_per_show'] = day_performance['Gross sales'] / day_performance['Event start date']
         
         print(f"\n🗓️ DAY OF WEEK PERFORMANCE:")
         day_performance_sorted = day_performance.sort_values('avg_orders_per_show', ascending=False)
-        for _, day in day_performance_sorted.iterrows():
-            print(f"   {day['day_of_week']}: {day['avg_orders_per_show']:.1f} avg orders/show, ${day['avg_revenue_per_show']:.2f} avg revenue/show")
+        print_lines([
+            f"   {day.day_of_week}: {day.avg_orders_per_show:.1f} avg orders/show, ${day.avg_revenue_per_show:.2f} avg revenue/show"
+            for day in day_performance_sorted.itertuples(index=False)
+        ])
         
         # 2. Pricing strategy impact
-        pricing_impact = self.df.groupby('Payment type').agg({
-            'Order ID': 'count',
-            'Gross sales': 'sum'
-        }).reset_index()
+        pricing_impact = show_payments.groupby(level='Payment type', sort=False, observed=True).sum().sort_index().reset_index()
         
         print(f"\n💰 PRICING STRATEGY IMPACT:")
         total_orders = pricing_impact['Order ID'].sum()
-        for _, payment in pricing_impact.iterrows():
-            percentage = (payment['Order ID'] / total_orders) * 100
-            avg_value = payment['Gross sales'] / payment['Order ID'] if payment['Order ID'] > 0 else 0
-            print(f"   {payment['Payment type']}: {payment['Order ID']:,} orders ({percentage:.1f}%), avg ${avg_value:.2f}")
-        
-        # 3. Advance booking patterns
-        booking_windows = pd.cut(self.df['days_before_event'], 
-                               bins=[-1, 0, 1, 3, 7, 14, 30, float('inf')],
-                               labels=['Same Day', '1 Day', '2-3 Days', '4-7 Days', '1-2 Weeks', '2-4 Weeks', '1+ Month'])
-        
-        booking_analysis = self.df.groupby(booking_windows).agg({
-            'Order ID': 'count',
-            'Gross sales': 'sum'
-        }).reset_index()
+        lines = []
+        for payment_type, orders, gross in pricing_impact[['Payment type', 'Order ID', 'Gross sales']].itertuples(index=False):
+            percentage = (orders / total_orders) * 100
+            avg_value = gross / orders if orders > 0 else 0
+            lines.append(f"   {payment_type}: {orders:,} orders ({percentage:.1f}%), avg ${avg_value:.2f}")
+        print_lines(lines)
+        
+        # 3. Advance booking patterns (binary-search bucketing, then bincount counts and sums)
+        codes = booking_window_codes(self.df['days_before_event'].to_numpy())
+        in_window = codes >= 0
+        codes = codes[in_window]
+        sales = np.nan_to_num(self.df['Gross sales'].to_numpy(dtype='float64')[in_window])
+        window_orders = np.bincount(codes, minlength=len(BOOKING_LABELS))
+        window_sales = np.bincount(codes, weights=sales, minlength=len(BOOKING_LABELS))
         
         print(f"\n📅 BOOKING WINDOW ANALYSIS:")
-        total_bookings = booking_analysis['Order ID'].sum()
-        for _, window in booking_analysis.iterrows():
-            percentage = (window['Order ID'] / total_bookings) * 100
-            avg_value = window['Gross sales'] / window['Order ID'] if window['Order ID'] > 0 else 0
-            print(f"   {window['days_before_event']}: {window['Order ID']:,} orders ({percentage:.1f}%), avg ${avg_value:.2f}")
+        total_bookings = window_orders.sum()
+        lines = []
+        for label, orders, revenue in zip(BOOKING_LABELS, window_orders, window_sales):
+            if orders == 0:
+                continue
+            percentage = (orders / total_bookings) * 100
+            avg_value = revenue / orders
+            lines.append(f"   {label}: {orders:,} orders ({percentage:.1f}%), avg ${avg_value:.2f}")
+        print_lines(lines)
         
-        # 4. Customer acquisition vs retention
-        customer_orders = self.df['customer_id'].value_counts()
-        new_customers = len(customer_orders[customer_orders == 1])
-        returning_customers = len(customer_orders[customer_orders > 1])
+        # 4. Customer acquisition vs retention (per-customer order counts and spend)
+        customer_totals = self.customer_totals
+        is_new = customer_totals['orders'].values == 1
+        new_customers = int(is_new.sum())
+        returning_customers = len(customer_totals) - new_customers
         
-        new_revenue = self.df[self.df['customer_id'].isin(customer_orders[customer_orders == 1].index)]['Gross sales'].sum()
-        returning_revenue = self.df[self.df['customer_id'].isin(customer_orders[customer_orders > 1].index)]['Gross sales'].sum()
+        new_revenue = customer_totals['spent'].values[is_new].sum()
+        returning_revenue = customer_totals['spent'].values[~is_new].sum()
         
         print(f"\n🔄 CUSTOMER ACQUISITION VS RETENTION:")
         print(f"   New customers: {new_customers:,} ({new_customers/(new_customers+returning_customers)*100:.1f}%)")
@@ -261,6 +450,7 @@ class ShowInsights:
         print(f"   New customer revenue: ${new_revenue:,.2f} ({new_revenue/(new_revenue+returning_revenue)*100:.1f}%)")
         print(f"   Returning customer revenue: ${returning_revenue:,.2f} ({returning_revenue/(new_revenue+returning_revenue)*100:.1f}%)")
         
+        self._day_performance = day_performance_sorted
         return day_performance_sorted
     
     def generate_actionable_recommendations(self):
@@ -279,7 +469,7 @@ class ShowInsights:
         recommendations.append(f"🗓️ SCHEDULING: Focus on {best_day} shows - they average {best_avg:.1f} orders per show")
         
         # Pricing recommendations
-        free_orders = len(self.df[self.df['Payment type'] == 'Free'])
+        free_orders = self._free_count
         total_orders = len(self.df)
         free_percentage = (free_orders / total_orders) * 100
         
@@ -289,15 +479,16 @@ class ShowInsights:
             recommendations.append(f"💰 PRICING: Good balance with {free_percentage:.1f}% free tickets")
         
         # Booking window recommendations
-        same_day = len(self.df[self.df['days_before_event'] == 0])
+        same_day = self._same_day_count
         same_day_pct = (same_day / total_orders) * 100
         
         if same_day_pct > 15:
             recommendations.append(f"📢 MARKETING: {same_day_pct:.1f}% are same-day purchases - promote earlier for better planning")
         
-        # Customer retention
-        repeat_customers = len(self.df['customer_id'].value_counts()[self.df['customer_id'].value_counts() > 1])
-        total_customers = self.df['customer_id'].nunique()
+        # Customer retention (shared per-customer totals give both repeat and total customers)
+        customer_orders = self.customer_totals['orders']
+        repeat_customers = int((customer_orders.values > 1).sum())
+        total_customers = len(customer_orders)
         repeat_rate = (repeat_customers / total_customers) * 100
         
         recommendations.append(f"🔄 RETENTION: {repeat_rate:.1f}% repeat rate - implement loyalty programs to increase")
@@ -308,8 +499,7 @@ class ShowInsights:
         recommendations.append(f"🗺️ GEOGRAPHIC: {dc_percentage:.1f}% from DC - consider targeted marketing in MD/VA")
         
         print(f"\n🎯 TOP RECOMMENDATIONS:")
-        for i, rec in enumerate(recommendations, 1):
-            print(f"   {i}. {rec}")
+        print_lines([f"   {i}. {rec}" for i, rec in enumerate(recommendations, 1)])
         
         return recommendations
 